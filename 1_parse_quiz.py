@@ -10,71 +10,92 @@ Output columns:
  - response_id   : the <response_label> ident (blank for the question row)
  - text          : the question text (first row) or the response text
  - is_correct    : “1” if this response is the correct one, “0” otherwise (blank for question row)
+ - group         : 0-based question index shared by a question row and its responses
 """
 
-import xml.etree.ElementTree as ET
 import csv
 import argparse
+import itertools
+import os
 import sys
 
-def extract_questions(xml_path):
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-    records = []
+from lxml import etree
+
+FIELDNAMES = ["question_id", "response_id", "text", "is_correct", "group"]
+
+# XPaths compiled once at import; local-name() keeps them namespace-agnostic
+# like the old ".//{*}..." ElementTree searches
+XP_VAREQ      = etree.XPath(".//*[local-name()='conditionvar']//*[local-name()='varequal']")
+XP_RESP_LABEL = etree.XPath(".//*[local-name()='response_label']")
+XP_MATTEXT    = etree.XPath(".//*[local-name()='mattext']")
+
+def _element_text(el):
+    """Stripped text of an element; leaf elements (the common case for
+    <mattext>) skip the itertext() subtree walk."""
+    if len(el) == 0:
+        return (el.text or "").strip()
+    return "".join(el.itertext()).strip()
+
+def _question_text(item):
+    """First non-empty mattext outside response_label/itemmetadata, found in
+    one depth-first walk instead of three findall passes plus a skip-set of
+    node identities."""
+    depth_in_skip = 0
+    for event, el in etree.iterwalk(item, events=("start", "end")):
+        if not isinstance(el.tag, str):
+            continue  # comments / processing instructions
+        tag = el.tag.rsplit("}", 1)[-1]
+        if tag in ("response_label", "itemmetadata"):
+            depth_in_skip += 1 if event == "start" else -1
+        elif event == "start" and tag == "mattext" and depth_in_skip == 0:
+            text = _element_text(el)
+            if text:
+                return text
+    return ""
 
-    for item in root.findall(".//{*}item"):
+def extract_questions(xml_path):
+    """Yield one (question_id, response_id, text, is_correct, group) tuple per row."""
+    for group_id, (_, item) in enumerate(etree.iterparse(xml_path, tag="{*}item")):
         # get the question's ident
-        qid = item.get("ident", "").strip()
+        qid = (item.get("ident") or "").strip()
 
         # find the correct response ident in the conditionvar
         correct_id = None
-        vareq = item.find(".//{*}conditionvar//{*}varequal")
-        if vareq is not None and vareq.text:
-            correct_id = vareq.text.strip()
-
-        # gather mattext under response_label and under itemmetadata so we can skip them
-        bad_mattext = set(item.findall(".//{*}itemmetadata//{*}mattext"))
-        for rl in item.findall(".//{*}response_label"):
-            bad_mattext.update(rl.findall(".//{*}mattext"))
-
-        # extract the question text = first mattext not in bad_mattext
-        question_text = ""
-        for mat in item.findall(".//{*}mattext"):
-            if mat not in bad_mattext:
-                question_text = "".join(mat.itertext()).strip()
-                if question_text:
-                    break
-
-        # append the question row
-        records.append({
-            "question_id": qid,
-            "response_id": "",
-            "text": question_text,
-            "is_correct": ""
-        })
-
-        # now append each response under its response_label
-        for rl in item.findall(".//{*}response_label"):
-            rid = rl.get("ident", "").strip()
-            mat = rl.find(".//{*}mattext")
-            resp_text = "".join(mat.itertext()).strip() if mat is not None else ""
+        vareqs = XP_VAREQ(item)
+        if vareqs and vareqs[0].text:
+            correct_id = vareqs[0].text.strip()
+
+        # extract the question text = first mattext outside
+        # response_label/itemmetadata, skipping those subtrees in one walk
+        response_labels = XP_RESP_LABEL(item)
+        question_text = _question_text(item)
+
+        # yield the question row
+        yield (qid, "", question_text, "", group_id)
+
+        # now yield each response under its response_label
+        for rl in response_labels:
+            rid = (rl.get("ident") or "").strip()
+            mats = XP_MATTEXT(rl)
+            resp_text = _element_text(mats[0]) if mats else ""
             is_corr = "1" if rid == correct_id else "0"
-            records.append({
-                "question_id": qid,
-                "response_id": rid,
-                "text": resp_text,
-                "is_correct": is_corr
-            })
+            yield (qid, rid, resp_text, is_corr, group_id)
 
-    return records
+        # release the processed subtree so memory stays flat on big exports
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
 
-def write_csv(records, out_path):
+def write_csv(rows, out_path):
+    """Stream rows to CSV one at a time; returns the number of rows written."""
+    count = 0
     with open(out_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f,
-            fieldnames=["question_id", "response_id", "text", "is_correct"])
-        writer.writeheader()
-        for rec in records:
-            writer.writerow(rec)
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
 
 def main():
     p = argparse.ArgumentParser(
@@ -85,16 +106,26 @@ def main():
         help="output CSV filename (default: question_bank.csv)")
     args = p.parse_args()
 
+    rows = extract_questions(args.xml_file)
     try:
-        records = extract_questions(args.xml_file)
-    except ET.ParseError as e:
+        # probe the generator so we can warn on an empty extraction
+        first = next(rows, None)
+    except etree.XMLSyntaxError as e:
         sys.exit(f"XML parse error: {e}")
 
-    if not records:
+    if first is None:
         print("⚠️  No questions/responses extracted. Check your XML structure.")
     else:
-        write_csv(records, args.csv)
-        print(f"✅ Wrote {len(records)} rows to {args.csv}")
+        try:
+            # iterparse is lazy, so malformed XML past the first item
+            # surfaces here, mid-write
+            n = write_csv(itertools.chain([first], rows), args.csv)
+        except etree.XMLSyntaxError as e:
+            # don't leave a partial CSV behind
+            if os.path.exists(args.csv):
+                os.remove(args.csv)
+            sys.exit(f"XML parse error: {e}")
+        print(f"✅ Wrote {n} rows to {args.csv}")
 
 if __name__ == "__main__":
     main()
@@ -2,23 +2,31 @@ import pandas as pd
 import csv
 import re
 import html
-from bs4 import BeautifulSoup
-from difflib import SequenceMatcher
+from functools import lru_cache
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:          # difflib fallback below
+    fuzz = process = None
+    from difflib import SequenceMatcher
 
 GRADE_CSV       = "grade_sample.csv"
 QUESTION_CSV    = "question_bank.csv"
 THRESHOLD       = 0.75    # minimum match ratio
 
+# the quiz strings are small tag soup, so a precompiled regex beats
+# building a BeautifulSoup DOM per string
+_TAG_RE   = re.compile(r"<[^>]+>")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_WS_RE    = re.compile(r"\s+")
+
+@lru_cache(maxsize=None)
 def normalize(text):
-    # 1) drop HTML if any
-    text = BeautifulSoup(text, "html.parser").get_text(separator=" ")
-    # 2) unescape entities
-    text = html.unescape(text)
+    # cached: duplicate strings normalize once
+    # 1) drop HTML tags if any, 2) unescape entities
+    text = html.unescape(_TAG_RE.sub(" ", text))
     # 3) lowercase, remove punctuation, collapse whitespace
-    text = text.lower()
-    text = re.sub(r"[^\w\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    text = _PUNCT_RE.sub(" ", text.lower())
+    return _WS_RE.sub(" ", text).strip()
 
 # ─── 1) Extract question texts from grade_sample headers ────────────────────
 df_grade = pd.read_csv(GRADE_CSV, dtype=str)
@@ -41,25 +49,60 @@ with open(QUESTION_CSV, newline="", encoding="utf-8") as f:
     reader = csv.DictReader(f)
     records = list(reader)
 
-# every 5 rows = one question
+# question rows have a blank response_id; their group id comes straight
+# from the bank instead of assuming 5 rows per question
 xml_questions = []
-for i in range(0, len(records), 5):
-    q_row = records[i]
-    raw_text = q_row["text"]
-    xml_questions.append((i//5, raw_text, normalize(raw_text)))
+for rec in records:
+    if not rec["response_id"]:
+        raw_text = rec["text"]
+        xml_questions.append((int(rec["group"]), raw_text, normalize(raw_text)))
 
 # ─── 3) Fuzzy-match each XML question to the best CSV header ────────────────
-def best_match(query, candidates):
-    best_hdr, best_score = None, 0
-    for hdr, text in candidates.items():
-        score = SequenceMatcher(None, query, text).ratio()
-        if score > best_score:
-            best_hdr, best_score = hdr, score
-    return best_hdr, best_score
+# score every (question × header) pair in one C-level cdist call instead of
+# a per-pair SequenceMatcher loop; rapidfuzz ratios come back 0–100.
+# token_set_ratio is word-order-insensitive, so headers that survived with
+# truncated or reshuffled whitespace/entity artifacts still score high
+queries     = [norm for _, _, norm in xml_questions]
+choice_hdrs = list(grade_qs.keys())
+choices     = list(grade_qs.values())
+
+if process is not None:
+    score_matrix = process.cdist(queries, choices, scorer=fuzz.token_set_ratio, workers=-1)
+    results = []
+    for norm, row in zip(queries, score_matrix):
+        top  = row.max()
+        tied = (row == top).nonzero()[0]
+        if len(tied) > 1:
+            # token_set_ratio saturates at 100 on token-subset matches, so break
+            # ties with the character-level ratio
+            best_idx = int(max(tied, key=lambda j: fuzz.ratio(norm, choices[j])))
+        else:
+            best_idx = int(tied[0])
+        results.append((choice_hdrs[best_idx], row[best_idx] / 100.0))
+else:
+    # pure-stdlib fallback: reuse one SequenceMatcher and prune with the
+    # cheap upper bounds so most candidates never pay for a full .ratio().
+    # The query stays seq1 and the candidate seq2, matching
+    # SequenceMatcher(None, query, text) exactly — ratio() is
+    # order-sensitive and autojunk only applies to seq2, so flipping the
+    # orientation changes scores on long texts
+    def best_match(query, candidates):
+        best_hdr, best_score = None, 0.0
+        sm = SequenceMatcher()
+        sm.set_seq1(query)
+        for hdr, text in candidates.items():
+            sm.set_seq2(text)
+            if sm.real_quick_ratio() <= best_score or sm.quick_ratio() <= best_score:
+                continue
+            score = sm.ratio()
+            if score > best_score:
+                best_hdr, best_score = hdr, score
+        return best_hdr, best_score
+
+    results = [best_match(norm, grade_qs) for norm in queries]
 
 mapping = []
-for qid, raw, norm in xml_questions:
-    hdr, score = best_match(norm, grade_qs)
+for (qid, raw, norm), (hdr, score) in zip(xml_questions, results):
     if score >= THRESHOLD:
         mapping.append({
             "xml_group": qid,
@@ -12,9 +12,11 @@ its lettered responses (A–D), coloring the correct one green and the
 student’s selection red so your downstream Markdown→HTML converter picks it up.
 """
 
+import numpy as np
 import pandas as pd
 import os
 import re
+from pathlib import Path
 
 # ─── CONFIG ────────────────────────────────────────────────────────────────────
 GRADE_CSV     = "grade_sample.csv"
@@ -26,6 +28,11 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 FRONT_COLS   = ["name","id","sis_id","section","section_id","section_sis_id","submitted","attempt"]
 SUMMARY_COLS = ["n correct","n incorrect","score"]
 
+# span templates built once; green wrapping is per-question (student-independent)
+# so it's applied while building response_map, red is per-student
+GREEN_FMT = '<span style="color:green;border: 1px solid green;border-radius: 10px;">{}</span>'
+RED_FMT   = '<span style="color:red">{}</span>'
+
 # ─── 1) Load grade CSV & detect question/flag columns ─────────────────────────
 df_grade = pd.read_csv(GRADE_CSV, dtype=str)
 middle   = [c for c in df_grade.columns if c not in FRONT_COLS + SUMMARY_COLS]
@@ -48,28 +55,44 @@ map_df = (
     pd.read_csv(MAPPING_CSV, dtype={"xml_group": int})
       .dropna(subset=["matched_header"])
 )
+# the bank carries an explicit group column from 1_parse_quiz, so no
+# row-position (// 5) arithmetic is needed here
 qb = pd.read_csv(QUESTION_CSV, dtype=str)
-qb["group"] = (qb.index // 5).astype(int)
+qb["group"] = qb["group"].astype(int)
 
-# Build: grade-header → list of dict(text, is_correct)
+# Build: grade-header → list of (stripped_text, ready_display) tuples with
+# letter prefix and green wrapping already applied, so the student loop only
+# needs to wrap the student's own pick in red
+groups = {g: sub for g, sub in qb.groupby("group", sort=False)}
 response_map = {}
-for _, m in map_df.iterrows():
-    hdr = m["matched_header"]
-    grp = int(m["xml_group"])
-    block = qb[qb["group"] == grp]
-    rows  = block.iloc[1:5] if len(block) >= 5 else block.iloc[1:]
-    response_map[hdr] = [
-        {"text": r["text"], "is_correct": r["is_correct"] == "1"}
-        for _, r in rows.iterrows()
-    ]
+for grp, hdr in map_df[["xml_group", "matched_header"]].itertuples(index=False):
+    block = groups.get(int(grp))
+    if block is None:
+        continue
+    rows = block.iloc[1:5] if len(block) >= 5 else block.iloc[1:]
+    opts = []
+    for letter, r in zip("ABCD", rows[["text", "is_correct"]].to_dict("records")):
+        display = f"{letter}. {r['text']}"
+        if r["is_correct"] == "1":
+            display = GREEN_FMT.format(display)
+        opts.append((str(r["text"]).strip(), display))
+    response_map[hdr] = opts
 
 # ─── 3) Generate per-student Markdown ─────────────────────────────────────────
-for _, student in df_grade.iterrows():
-    sid   = student["id"]
-    name  = student["name"]
-    sect  = student["section"]
-    score = student["score"]
+# cast the flag columns to a numeric S×Q matrix once; np.nonzero per row then
+# visits only the incorrect questions instead of str→float converting every cell
+flag_arr = (
+    df_grade[f_cols]
+      .apply(pd.to_numeric, errors="coerce")
+      .fillna(1)
+      .astype(np.int8)
+      .to_numpy()
+)
+wrong_mask = flag_arr == 0
+ans_arr    = df_grade[q_cols].to_numpy()
 
+for row_i, (sid, name, sect, score) in enumerate(
+        df_grade[["id", "name", "section", "score"]].itertuples(index=False)):
     lines = [
         f"# {sid} – {name}",
         f"### {sect}",
@@ -78,34 +101,23 @@ for _, student in df_grade.iterrows():
         ""
     ]
 
-    for seq, q_col, f_col, qtext in question_meta:
-        if float(student[f_col]) == 0:   # only for incorrect
-            opts     = response_map.get(q_col, [])
-            stud_ans = student[q_col].strip()
-
-            lines.append(f"**Question {seq}:** {qtext}")
-            for idx, resp in enumerate(opts):
-                letter = chr(ord("A") + idx)
-                text   = resp["text"]
-                correct = resp["is_correct"]
-                picked  = (text.strip() == stud_ans)
-
-                display = f"{letter}. {text}"
-                # color correct answers green
-                if correct:
-                    display = f'<span style="color:green;border: 1px solid green;border-radius: 10px;">{display}</span>'
-                # color the student's (wrong) pick red
-                if picked:
-                    display = f'<span style="color:red">{display}</span>'
-
-                lines.append(f"  {display}")
-            lines.append("")
+    for q_idx in np.nonzero(wrong_mask[row_i])[0]:
+        seq, q_col, f_col, qtext = question_meta[q_idx]
+        opts     = response_map.get(q_col, [])
+        stud_ans = str(ans_arr[row_i, q_idx]).strip()
+
+        lines.append(f"**Question {seq}:** {qtext}")
+        for opt_text, display in opts:
+            # color the student's (wrong) pick red
+            if opt_text == stud_ans:
+                display = RED_FMT.format(display)
+            lines.append(f"  {display}")
+        lines.append("")
 
     if len(lines) == 4:
         lines.append("_No incorrect answers!_")
 
     safe = re.sub(r"[^\w\-]", "_", f"{sid}_{name}")
-    with open(os.path.join(OUTPUT_DIR, safe + ".md"), "w", encoding="utf-8") as fo:
-        fo.write("\n".join(lines))
+    Path(OUTPUT_DIR, safe + ".md").write_text("\n".join(lines), encoding="utf-8")
 
 print(f"✅ Generated colorized Markdown reports in ./{OUTPUT_DIR}/")
\ No newline at end of file
@@ -5,8 +5,10 @@ Converts all .md files in a folder to HTML with embedded CSS styling
 """
 
 import os
+import re
 import sys
 import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 try:
@@ -213,56 +215,79 @@ CSS_TEMPLATE = """
 </html>
 """
 
+# split the template once at import so per-file rendering is plain string
+# concatenation instead of re-scanning ~5 KB of doubled-brace CSS via .format
+_HEAD, _rest = CSS_TEMPLATE.split("{title}", 1)
+_MID, _TAIL  = _rest.split("{content}", 1)
+_HEAD = _HEAD.replace("{{", "{").replace("}}", "}")
+_MID  = _MID.replace("{{", "{").replace("}}", "}")
+_TAIL = _TAIL.replace("{{", "{").replace("}}", "}")
+
+# matches a numbered list marker like "12." or "3)" at the start of a line
+_NUM_LIST_RE = re.compile(r'^\d{1,2}[.)]')
+
 def preprocess_markdown(md_content):
     """
     Preprocess markdown content to better preserve line breaks and formatting
     """
     lines = md_content.split('\n')
     processed_lines = []
-    
+
     for i, line in enumerate(lines):
         processed_lines.append(line)
-        
+
         # Add extra spacing after numbered list items if the next line isn't empty
-        if (line.strip() and 
-            i < len(lines) - 1 and 
-            lines[i + 1].strip() and 
+        if (line.strip() and
+            i < len(lines) - 1 and
+            lines[i + 1].strip() and
             not lines[i + 1].startswith((' ', '\t')) and
-            (line.strip().startswith(tuple(f'{j}.' for j in range(1, 100))) or
-             line.strip().startswith(tuple(f'{j})' for j in range(1, 100))))):
+            _NUM_LIST_RE.match(line.strip())):
             # If next line is also a numbered item or starts new content, add spacing
             next_line = lines[i + 1].strip()
-            if (next_line.startswith(tuple(f'{j}.' for j in range(1, 100))) or
-                next_line.startswith(tuple(f'{j})' for j in range(1, 100))) or
-                next_line.startswith('#')):
+            if _NUM_LIST_RE.match(next_line) or next_line.startswith('#'):
                 processed_lines.append('')
-    
+
     return '\n'.join(processed_lines)
 
-def convert_markdown_to_html(md_file_path, output_dir=None):
+# per-process converter cache: each worker process builds the Markdown
+# instance (and its extensions) once and resets it between files
+_MD = None
+
+def _get_converter():
+    global _MD
+    if _MD is None:
+        _MD = markdown.Markdown(extensions=['extra', 'codehilite', 'toc', 'nl2br'])
+    else:
+        _MD.reset()
+    return _MD
+
+def convert_markdown_to_html(md_file_path, output_dir=None, md=None):
     """
     Convert a single Markdown file to HTML with embedded CSS
+
+    Uses a cached markdown.Markdown instance (reset between conversions)
+    unless an explicit `md` is passed in.
     """
     try:
         # Read the markdown file
         with open(md_file_path, 'r', encoding='utf-8') as f:
             md_content = f.read()
-        
+
         # Preprocess the markdown for better formatting
         md_content = preprocess_markdown(md_content)
-        
+
         # Convert markdown to HTML with line break preservation
-        md = markdown.Markdown(extensions=['extra', 'codehilite', 'toc', 'nl2br'])
+        if md is None:
+            md = _get_converter()
+        else:
+            md.reset()
         html_content = md.convert(md_content)
         
         # Get the title (first h1 or filename)
         title = Path(md_file_path).stem.replace('_', ' ').replace('-', ' ').title()
         
         # Generate the complete HTML
-        full_html = CSS_TEMPLATE.format(
-            title=title,
-            content=html_content
-        )
+        full_html = _HEAD + title + _MID + html_content + _TAIL
         
         # Determine output path
         if output_dir:
@@ -305,20 +330,22 @@ def convert_folder(input_folder, output_folder=None):
         return
     
     print(f"Found {len(md_files)} Markdown file(s) to convert:")
-    
+
     converted_files = []
-    
-    for md_file in md_files:
-        print(f"Converting: {md_file.name}")
-        
-        if output_path:
-            html_file = convert_markdown_to_html(md_file, output_path)
-        else:
-            html_file = convert_markdown_to_html(md_file)
-        
-        if html_file:
-            converted_files.append(html_file)
-            print(f"  → {html_file}")
+
+    # the files are independent, so fan them out across worker processes;
+    # each worker caches its own Markdown instance via _get_converter
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {
+            executor.submit(convert_markdown_to_html, md_file, output_path): md_file
+            for md_file in md_files
+        }
+        for future in as_completed(futures):
+            md_file = futures[future]
+            html_file = future.result()
+            if html_file:
+                converted_files.append(html_file)
+                print(f"Converted: {md_file.name} → {html_file}")
     
     print(f"\nConversion complete! {len(converted_files)} file(s) converted.")
     
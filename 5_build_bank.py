@@ -5,17 +5,44 @@ pivot_question_bank.py
 Reads question_bank.csv (columns: question_id, response_id, text, is_correct),
 strips HTML from question_text, and emits questions_wide.csv with one row per question:
 
-  question_id, question_text, A, B, C, D, correct_label
+  question_id, question_text, question_text_norm, A, B, C, D,
+  A_norm, B_norm, C_norm, D_norm, correct_label
+
+The *_norm columns hold fully normalized text (tags stripped, entities
+unescaped, lowercased, punctuation removed) so downstream matching can
+skip re-normalizing on every run.
 """
 
+import html
+import re
+
 import pandas as pd
-from bs4 import BeautifulSoup
+
+_TAG_RE   = re.compile(r"<[^>]+>")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_WS_RE    = re.compile(r"\s+")
+
+def normalize(text):
+    """Match the normalization used by the grade-matching scripts."""
+    text = html.unescape(_TAG_RE.sub(" ", str(text)))
+    text = _PUNCT_RE.sub(" ", text.lower())
+    return _WS_RE.sub(" ", text).strip()
 
 # 1) Load & sanitize
 qb = pd.read_csv("question_bank.csv", dtype=str)
 qb["response_id"] = qb["response_id"].fillna("").astype(str)
 qb["is_correct"]  = qb["is_correct"].fillna("").astype(str)
 
+# strip HTML from the whole text column in one vectorized pass instead of
+# building a BeautifulSoup DOM per question inside the group loop
+qb["text_clean"] = (
+    qb["text"].fillna("")
+      .str.replace(r"<[^>]+>", " ", regex=True)
+      .map(html.unescape)
+      .str.replace(r"\s+", " ", regex=True)
+      .str.strip()
+)
+
 records = []
 
 # 2) Group by question_id
@@ -25,9 +52,7 @@ for qid, grp in qb.groupby("question_id", sort=False):
     if q_rows.empty:
         print(f"⚠️  Skipping {qid!r}: no question-text row.")
         continue
-    question_text = q_rows.iloc[0]["text"]
-    # strip HTML
-    question_text = BeautifulSoup(question_text, "html.parser").get_text().strip()
+    question_text = q_rows.iloc[0]["text_clean"]
 
     # grab response rows
     resp = grp[grp["response_id"] != ""].reset_index(drop=True)
@@ -42,12 +67,15 @@ for qid, grp in qb.groupby("question_id", sort=False):
     correct_label = chr(ord("A") + correct_indices[0]) if correct_indices else ""
 
     row = {
-        "question_id":   qid,
-        "question_text": question_text,
-        "correct_label": correct_label
+        "question_id":        qid,
+        "question_text":      question_text,
+        "question_text_norm": normalize(question_text),
+        "correct_label":      correct_label
     }
     for idx, letter in enumerate(["A", "B", "C", "D"]):
-        row[letter] = options[idx] if idx < len(options) else ""
+        opt = options[idx] if idx < len(options) else ""
+        row[letter] = opt
+        row[letter + "_norm"] = normalize(opt)
     records.append(row)
 
 # 3) Write out
@@ -4,19 +4,22 @@ pivot_grade_flags.py
 
 Reads:
  - grade_sample.csv (with columns: question headers like '12345: Question text')
- - questions_wide.csv   (with columns question_text, A, B, C, D)
+ - questions_wide.csv   (with columns question_text, A, B, C, D and *_norm)
 
 Produces grade_with_answers.csv where each flag column is replaced
 by A/B/C/D based on matching the student's submitted answer text to the
 A–D columns in questions_wide.csv, matching by question text (not IDs).
+
+The grade CSV is streamed row by row through csv.reader/csv.writer, so
+peak memory stays O(questions) regardless of roster size.
 """
 
-import pandas as pd
+import csv
 import os
 import re
-from bs4 import BeautifulSoup
 import html
-from difflib import SequenceMatcher
+from functools import lru_cache
+from rapidfuzz import fuzz, process
 
 # ─── CONFIG ───────────────────────────────────────────────────────────────────
 GRADE_CSV       = "grade_sample.csv"
@@ -36,83 +39,101 @@ SUMMARY_COLS = ["n correct", "n incorrect", "score"]
 
 # ─── HELPERS ───────────────────────────────────────────────────────────────────
 
+# the answer strings are small tag soup, so precompiled regexes beat
+# building a BeautifulSoup DOM per string
+_TAG_RE   = re.compile(r"<[^>]+>")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_WS_RE    = re.compile(r"\s+")
+
+@lru_cache(maxsize=None)
 def normalize_text(s):
     """
     Remove HTML tags, unescape entities, lowercase, strip punctuation and collapse whitespace.
+
+    Cached: the same option/answer strings recur across students.
     """
-    if pd.isna(s) or not str(s).strip():
+    if not s or not str(s).strip():
+        return ""
+    text = html.unescape(_TAG_RE.sub(" ", str(s)))
+    text = _PUNCT_RE.sub(" ", text.lower())
+    return _WS_RE.sub(" ", text).strip()
+
+def map_to_letter(ans, raw_to_letter, norm_to_letter, norm_options):
+    """Resolve one student answer: verbatim → normalized → fuzzy fallback."""
+    ans = ans.strip()
+    if not ans:
+        return ""
+    letter = raw_to_letter.get(ans)
+    if letter:
+        return letter
+    norm_ans = normalize_text(ans)
+    if not norm_ans:
         return ""
-    text = str(s)
-    # strip HTML
-    text = re.sub(r"<[^>]+>", " ", text)
-    # parse HTML entities
-    text = BeautifulSoup(text, "html.parser").get_text(separator=" ")
-    text = html.unescape(text)
-    # lowercase
-    text = text.lower()
-    # remove punctuation
-    text = re.sub(r"[^\w\s]", " ", text)
-    # collapse whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
-# fuzzy match helper
-def best_fuzzy_match(ans, options):
-    best_letter, best_score = "", 0.0
-    for letter, opt in options.items():
-        score = SequenceMatcher(None, ans, normalize_text(opt)).ratio()
-        if score > best_score:
-            best_letter, best_score = letter, score
-    return best_letter if best_score >= FUZZY_THRESHOLD else ""
-
-# ─── 1) LOAD DATA ─────────────────────────────────────────────────────────────
-df_grade = pd.read_csv(GRADE_CSV, dtype=str).fillna("")
-qw       = pd.read_csv(QUESTIONS_WIDE, dtype=str).fillna("")
-
-# Build a lookup: normalized_question_text -> { letter: raw option }
+    letter = norm_to_letter.get(norm_ans)
+    if letter:
+        return letter
+    match = process.extractOne(
+        norm_ans, norm_options,
+        scorer=fuzz.ratio, score_cutoff=FUZZY_THRESHOLD * 100,
+    )
+    return match[2] if match else ""
+
+# ─── 1) LOAD QUESTION BANK ───────────────────────────────────────────────────
+# Build a lookup: normalized_question_text -> { letter: (raw, normalized) }
+# using the *_norm columns 5_build_bank.py persists; falls back to
+# normalizing here if reading an older questions_wide.csv
 text_map = {}
-for _, row in qw.iterrows():
-    raw_qtext = row.get("question_text", "")
-    norm_q   = normalize_text(raw_qtext)
-    opts = {}
-    for letter in ["A","B","C","D"]:
-        val = row.get(letter, "")
-        if pd.notna(val) and str(val).strip():
-            opts[letter] = str(val).strip()
-    if norm_q:
-        text_map[norm_q] = opts
-
-# ─── 2) DETECT QUESTION / FLAG PAIRS ───────────────────────────────────────────
-cols_mid = [c for c in df_grade.columns if c not in FRONT_COLS + SUMMARY_COLS]
-q_cols   = cols_mid[0::2]
-f_cols   = cols_mid[1::2]
-
-# ─── 3) REPLACE FLAGS WITH LETTERS ───────────────────────────────────────────
-for q_col, f_col in zip(q_cols, f_cols):
-    # extract only the question text portion after the colon
-    parts = str(q_col).split(":", 1)
-    qtext = parts[1] if len(parts) > 1 else parts[0]
-    norm_q = normalize_text(qtext)
-    options = text_map.get(norm_q)
-    if not options:
-        print(f"⚠️  No matching question text for header '{q_col}'")
-        df_grade[f_col] = ""
-        continue
-
-    def map_to_letter(ans):
-        norm_ans = normalize_text(ans)
-        if not norm_ans:
-            return ""
-        # direct match
-        for letter, opt in options.items():
-            if normalize_text(opt) == norm_ans:
-                return letter
-        # fuzzy fallback
-        return best_fuzzy_match(norm_ans, options)
-
-    df_grade[f_col] = df_grade[q_col].apply(map_to_letter)
-
-# ─── 4) WRITE OUTPUT ─────────────────────────────────────────────────────────
+with open(QUESTIONS_WIDE, newline="", encoding="utf-8") as f:
+    for row in csv.DictReader(f):
+        norm_q = row.get("question_text_norm", "") or normalize_text(row.get("question_text", ""))
+        opts = {}
+        for letter in ["A","B","C","D"]:
+            raw = (row.get(letter) or "").strip()
+            if raw:
+                opts[letter] = (raw, row.get(letter + "_norm", "") or normalize_text(raw))
+        if norm_q:
+            text_map[norm_q] = opts
+
+# ─── 2) STREAM GRADE ROWS, REPLACING FLAGS WITH LETTERS ──────────────────────
 out_path = os.path.join(OUTPUT_DIR, OUTPUT_CSV)
-df_grade.to_csv(out_path, index=False)
-print(f"✅ Wrote {len(df_grade)} rows to {out_path}")
\ No newline at end of file
+n_rows = 0
+
+with open(GRADE_CSV, newline="", encoding="utf-8") as fin, \
+     open(out_path, "w", newline="", encoding="utf-8") as fout:
+    reader = csv.reader(fin)
+    writer = csv.writer(fout)
+
+    header = next(reader)
+    writer.writerow(header)
+
+    mid_idx = [i for i, c in enumerate(header) if c not in FRONT_COLS + SUMMARY_COLS]
+    q_idx   = mid_idx[0::2]
+    f_idx   = mid_idx[1::2]
+
+    # resolve each question column's lookup tables once, up front
+    col_lookups = []
+    for qi in q_idx:
+        parts = header[qi].split(":", 1)
+        qtext = parts[1] if len(parts) > 1 else parts[0]
+        options = text_map.get(normalize_text(qtext))
+        if not options:
+            print(f"⚠️  No matching question text for header '{header[qi]}'")
+            col_lookups.append(None)
+            continue
+        raw_to_letter  = {raw: letter for letter, (raw, _) in options.items()}
+        norm_options   = {letter: norm for letter, (_, norm) in options.items()}
+        norm_to_letter = {v: k for k, v in norm_options.items()}
+        col_lookups.append((raw_to_letter, norm_to_letter, norm_options))
+
+    for row in reader:
+        if len(row) < len(header):
+            row.extend([""] * (len(header) - len(row)))
+        for qi, fi, lookups in zip(q_idx, f_idx, col_lookups):
+            if lookups is None:
+                row[fi] = ""
+            else:
+                row[fi] = map_to_letter(row[qi], *lookups)
+        writer.writerow(row)
+        n_rows += 1
+
+print(f"✅ Wrote {n_rows} rows to {out_path}")